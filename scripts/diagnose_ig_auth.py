@@ -6,14 +6,14 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
-from src.services.instagram import InstagramGraphClient
+from src.services.instagram import get_ig_client
 from src.core.logger import Log
 from src.config.settings import settings
 
 def main():
     Log.info("=== Instagram Authentication & Ownership Diagnostic ===")
     
-    client = InstagramGraphClient()
+    client = get_ig_client()
     
     Log.info(f"Current API Version: {settings.ig_api_version}")
     Log.info(f"Current User ID: {settings.ig_user_id}")
@@ -1,13 +1,12 @@
 import sys
 import os
-import time
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config.settings import settings
 from src.core.logger import Log
-from src.services.instagram import InstagramGraphClient
+from src.services.instagram import get_ig_client
 
 # ==========================================
 # CONFIGURATION - EDIT THESE VALUES
@@ -34,7 +33,7 @@ def main():
 
         # 1. Initialize Instagram Graph Client
         Log.info("Initializing Instagram Graph Client...")
-        ig_client = InstagramGraphClient()
+        ig_client = get_ig_client()
 
         # 2. Upload Reel via URL
         Log.info("Starting URL-based upload to Instagram...")
@@ -49,18 +48,11 @@ def main():
         if not container_id:
             raise Exception("Failed to create Instagram media container via URL")
 
-        for i in range(30):
-            status = ig_client.check_status(container_id)
-            Log.info(f"Container status ({i+1}/30): {status}")
-            if status == "FINISHED":
-                break
-            time.sleep(20)
-
         Log.info(f"Media container created (ID: {container_id}). Waiting for processing...")
-        media_id = ig_client.publish_media(container_id)
+        permalink = ig_client.wait_and_publish(container_id)
 
-        if media_id:
-            Log.info(f"SUCCESS: Reel published! Media ID: {media_id}")
+        if permalink:
+            Log.info(f"SUCCESS: Reel published! Permalink: {permalink}")
         else:
             raise Exception("Failed to publish Reel after processing")
 
@@ -2,6 +2,7 @@ import sys
 import os
 import time
 import argparse
+from concurrent.futures import Future
 
 
 # Add project root to path
@@ -9,15 +10,40 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config.settings import settings
 from src.core.logger import Log
-from src.core.video_generator import add_text_to_video
-from src.services.groq_client import GroqQuoteGenerator
+from src.core.video_generator import (
+    add_text_to_video,
+    probe_video,
+    thumbnail_path_for,
+)
+from src.services.groq_client import fallback_quote, get_groq_generator
 from src.core.seo import SEOManager
-from src.services.storage import MinIOClient
-from src.services.instagram import InstagramGraphClient
+from src.services.storage import get_storage_client
+from src.services.instagram import get_ig_client
+
+
+def generate_copy():
+    """
+    Request the quote and engaging caption from Groq, with static fallbacks.
+    Returns as soon as the quote is ready; the caption keeps streaming and is
+    returned as a future that resolves to the caption or None.
+    """
+    Log.info("Requesting romantic quote and engaging body from Groq...")
+    try:
+        generator = get_groq_generator()
+        return generator.stream_quote_and_caption()
+    except Exception as e:
+        Log.warning(f"Groq generation failed: {e}. Using fallback content.")
+        caption_future = Future()
+        caption_future.set_result(None)
+        return fallback_quote(), caption_future
 
 
 def generate_video(quote):
-    """Generate a new video with dynamic quote only"""
+    """
+    Generate a new video with dynamic quote only.
+    Returns (reminder_body, thumbnail_path); every renderer writes the cover
+    next to the video, so the path is known without checking the disk.
+    """
     Log.info("Starting video generation pipeline...")
 
     reminder_body = (
@@ -33,13 +59,59 @@ def generate_video(quote):
         font_size=55,
         color="white",
         audio_path=settings.audio_track_path,
+        threads=min(16, os.cpu_count() or 1),
     )
 
     if not success:
         raise Exception("Video generation failed")
 
     Log.info("Video generation completed successfully.")
-    return reminder_body
+    return reminder_body, thumbnail_path_for(settings.output_path)
+
+
+def log_video_diagnostics(video_path):
+    """Log duration/resolution/fps and warn about values Instagram may reject"""
+    try:
+        info = probe_video(video_path)
+        if not info:
+            raise Exception("ffprobe returned no data")
+        w, h = info["width"], info["height"]
+        Log.info(
+            "Video Diagnostics: Duration=%ss, Resolution=%sx%s, FPS=%s",
+            info["duration"], w, h, info["fps"],
+        )
+        if info["duration"] < 3:
+            Log.warning("Video duration is less than 3 seconds. Instagram might reject it.")
+        if h and w / h != 9/16 and abs(w / h - 9/16) > 0.01:
+            Log.warning(f"Video aspect ratio ({w/h:.2f}) is not 9:16. Instagram might reject it.")
+    except Exception as de:
+        Log.warning(f"Could not log video diagnostics: {de}")
+
+
+def upload_cover(storage_client, thumbnail_path, timestamp):
+    """Upload the rendered cover to MinIO and return its presigned URL, or None"""
+    thumbnail_name = f"cover_{timestamp}.jpg"
+    if not storage_client.upload_file(str(thumbnail_path), thumbnail_name):
+        return None
+    return storage_client.get_presigned_url(thumbnail_name)
+
+
+def create_container_via_url(storage_client, ig_client, caption, cover_url, timestamp):
+    """
+    Upload the video to MinIO and have Instagram fetch it from a presigned URL.
+    Every step reports failure by returning None/False, so this does too.
+    """
+    file_name = f"reel_{timestamp}.mp4"
+    Log.info(f"Uploading video to MinIO for public URL: {file_name}")
+    if not storage_client.upload_file(str(settings.output_path), file_name):
+        return None
+
+    video_url = storage_client.get_presigned_url(file_name)
+    if not video_url:
+        return None
+
+    Log.info("Creating Instagram media container via URL...")
+    return ig_client.upload_reel(video_url, caption, cover_url=cover_url)
 
 
 def main():
@@ -56,31 +128,17 @@ def main():
         if args.dry_run:
             Log.info("DRY RUN MODE: Upload and publishing will be skipped.")
 
-        Log.info("Requesting romantic quote and engaging body from Groq...")
-        try:
-            generator = GroqQuoteGenerator()
-            groq_quote = generator.generate_quote()
-            engaging_caption = generator.generate_engaging_caption(groq_quote)
-        except Exception as e:
-            Log.warning(f"Groq generation failed: {e}. Using fallback content.")
-            groq_quote = "Every day I love you more than yesterday."
-            engaging_caption = None
+        groq_quote, caption_future = generate_copy()
 
-        reminder_text = generate_video(groq_quote)
+        # The caption finishes streaming while the video renders
+        reminder_text, thumbnail_path = generate_video(groq_quote)
+        engaging_caption = caption_future.result()
 
-        try:
-            from moviepy.editor import VideoFileClip
-            with VideoFileClip(str(settings.output_path)) as clip:
-                Log.info(f"Video Diagnostics: Duration={clip.duration}s, Resolution={clip.w}x{clip.h}, FPS={clip.fps}")
-                if clip.duration < 3:
-                    Log.warning("Video duration is less than 3 seconds. Instagram might reject it.")
-                if clip.w / clip.h != 9/16 and abs(clip.w / clip.h - 9/16) > 0.01:
-                    Log.warning(f"Video aspect ratio ({clip.w/clip.h:.2f}) is not 9:16. Instagram might reject it.")
-        except Exception as de:
-            Log.warning(f"Could not log video diagnostics: {de}")
-
-        keywords = settings.keywords
-        hashtags = settings.hashtags
+        if settings.diagnostics_enabled:
+            log_video_diagnostics(settings.output_path)
+
+        keywords = settings.keywords_str
+        hashtags = settings.hashtags_str
         caption = SEOManager.generate_caption(
             keywords=keywords,
             hashtags=hashtags,
@@ -96,42 +154,35 @@ def main():
             return
 
         Log.info("Initializing Instagram Graph Client...")
-        ig_client = InstagramGraphClient()
+        ig_client = get_ig_client()
 
-        container_id = None
-        storage_client = MinIOClient()
-        
+        timestamp = int(time.time())
+        cover_url = None
+        storage_client = None
         try:
-            timestamp = int(time.time())
-            
-            file_name = f"reel_{timestamp}.mp4"
-            Log.info(f"Uploading video to MinIO for public URL: {file_name}")
-            if storage_client.upload_file(str(settings.output_path), file_name):
-                video_url = storage_client.get_presigned_url(file_name)
-                
-                cover_url = None
-                thumbnail_local = f"{settings.output_path}.jpg"
-                if os.path.exists(thumbnail_local):
-                    thumbnail_name = f"cover_{timestamp}.jpg"
-                    if storage_client.upload_file(thumbnail_local, thumbnail_name):
-                        cover_url = storage_client.get_presigned_url(thumbnail_name)
-                
-                Log.info("Creating Instagram media container via URL...")
-                container_id = ig_client.upload_reel(video_url, caption, cover_url=cover_url)
-                
-                if container_id:
-                    Log.success(f"Container created successfully: {container_id}")
-            
+            storage_client = get_storage_client()
+            cover_url = upload_cover(storage_client, thumbnail_path, timestamp)
         except Exception as e:
-            Log.error(f"URL-based upload preparation failed: {e}")
+            Log.warning(f"Cover upload failed: {e}. Continuing without a cover.")
+
+        # Streaming the file straight to Instagram is one hop; the URL path
+        # first PUTs the whole video to MinIO and then waits for IG to fetch it
+        Log.info("Creating Instagram media container via binary upload...")
+        container_id = ig_client.upload_reel_binary(
+            str(settings.output_path),
+            caption,
+            cover_url=cover_url,
+        )
+        if container_id:
+            Log.success(f"Container created via binary upload: {container_id}")
 
-        if not container_id:
-            Log.warning("URL upload failed or skipped. Attempting Binary Upload fallback...")
-            container_id = ig_client.upload_reel_binary(
-                str(settings.output_path),
-                caption,
-                cover_url=None,
+        if not container_id and storage_client:
+            Log.warning("Binary upload failed. Attempting URL upload fallback...")
+            container_id = create_container_via_url(
+                storage_client, ig_client, caption, cover_url, timestamp
             )
+            if container_id:
+                Log.success(f"Container created via URL upload: {container_id}")
 
         if not container_id:
             raise Exception("Failed to create Instagram container via any method")
@@ -1,9 +1,27 @@
+from functools import cached_property
 from pydantic import Field
 from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 
 
+# Cross-platform font detection for Times New Roman
+_FONT_CANDIDATES = [
+    "/System/Library/Fonts/Supplemental/Times New Roman.ttf",  # MacOS
+    "/usr/share/fonts/truetype/msttcorefonts/Times_New_Roman.ttf",  # Linux
+    "Times-New-Roman",  # ImageMagick Alias
+    "DejaVu-Serif",  # Safety fallback
+]
+
+
+def _resolve_font() -> str:
+    """First font file that exists, or the first ImageMagick/fontconfig alias"""
+    return next(
+        (f for f in _FONT_CANDIDATES if not f.startswith("/") or Path(f).exists()),
+        "Times-New-Roman",
+    )
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
@@ -31,6 +49,9 @@ class Settings(BaseSettings):
     output_path: Path = src_dir / "output_video.mp4"
     audio_track_path: Path = src_dir / "core" / "audio_track.mp4"
 
+    reel_font: str = Field(alias="REEL_FONT", default_factory=_resolve_font)
+    diagnostics_enabled: bool = Field(alias="DIAGNOSTICS_ENABLED", default=True)
+
     hashtags: list[str] = [
         "#ForYou",
         "#Fyp",
@@ -64,5 +85,15 @@ class Settings(BaseSettings):
         "couple growth",
     ]
 
+    @cached_property
+    def hashtags_str(self) -> str:
+        """Hashtags joined once for caption building"""
+        return " ".join(self.hashtags)
+
+    @cached_property
+    def keywords_str(self) -> str:
+        """Keywords joined once for caption building"""
+        return ", ".join(self.keywords)
+
 
 settings = Settings()
@@ -1,48 +1,88 @@
 from datetime import datetime
+import logging
+import os
 import sys
+import pytz
+
+_IST = pytz.timezone('Asia/Kolkata')
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+# ANSI reset code
+RESET = "\033[0m"
+
+# Padded level label and color per level
+_LEVEL_STYLES = {
+    logging.DEBUG: ("  DEBUG", "\033[96m"),  # Cyan
+    logging.INFO: ("   INFO", "\033[94m"),  # Blue
+    SUCCESS: ("SUCCESS", "\033[92m"),  # Green
+    logging.WARNING: ("WARNING", "\033[93m"),  # Yellow
+    logging.ERROR: ("  ERROR", "\033[91m"),  # Red
+}
+
+
+class _ColorFormatter(logging.Formatter):
+    """Formats records as `[IST time] [LEVEL] message` with a colored level"""
+
+    def formatTime(self, record, datefmt=None):
+        return datetime.fromtimestamp(record.created, _IST).strftime('%Y-%m-%d %H:%M:%S')
+
+    def format(self, record):
+        label, color_code = _LEVEL_STYLES.get(record.levelno, (record.levelname, ""))
+        time_str = self.formatTime(record)
+        if color_code:
+            return f"[{time_str}] {color_code}[{label}]{RESET} {record.getMessage()}"
+        return f"[{time_str}] [{label}] {record.getMessage()}"
+
+
+def _build_logger():
+    logger = logging.getLogger("video_maker")
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+    formatter = _ColorFormatter()
+
+    # Everything below ERROR goes to stdout, errors to stderr
+    stdout_handler = logging.StreamHandler(sys.stdout)
+    stdout_handler.setFormatter(formatter)
+    stdout_handler.addFilter(lambda record: record.levelno < logging.ERROR)
+
+    stderr_handler = logging.StreamHandler(sys.stderr)
+    stderr_handler.setLevel(logging.ERROR)
+    stderr_handler.setFormatter(formatter)
+
+    logger.addHandler(stdout_handler)
+    logger.addHandler(stderr_handler)
+    return logger
+
+
+_logger = _build_logger()
+
 
 class Log:
     """
-    Custom logger class with static methods using print.
+    Custom logger class with static methods, delegating to a `logging` logger.
+    Set LOG_LEVEL (default INFO) to filter output. Extra args are %-formatted
+    only if the record is actually emitted.
     """
-    
-    @staticmethod
-    def _timestamp():
-        import pytz
-        return datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d %H:%M:%S')
-
-    @staticmethod
-    def _format(level, message, color_code=""):
-        time_str = Log._timestamp()
-        # ANSI reset code
-        RESET = "\033[0m"
-        # If color_code is provided, wrap the whole line or just the level. 
-        # Let's wrap the level and message for visibility.
-        if color_code:
-            return f"[{time_str}] {color_code}[{level}]{RESET} {message}"
-        return f"[{time_str}] [{level}] {message}"
 
     @staticmethod
-    def info(message):
-        # Blue for INFO
-        print(Log._format("   INFO", message, "\033[94m"), flush=True)
+    def info(message, *args):
+        _logger.info(message, *args)
 
     @staticmethod
-    def success(message):
-        # Green for SUCCESS
-        print(Log._format("SUCCESS", message, "\033[92m"), flush=True)
+    def success(message, *args):
+        _logger.log(SUCCESS, message, *args)
 
     @staticmethod
-    def warning(message):
-        # Yellow for WARNING
-        print(Log._format("WARNING", message, "\033[93m"), flush=True)
+    def warning(message, *args):
+        _logger.warning(message, *args)
 
     @staticmethod
-    def error(message):
-        # Red for ERROR
-        print(Log._format("  ERROR", message, "\033[91m"), file=sys.stderr, flush=True)
+    def error(message, *args):
+        _logger.error(message, *args)
 
     @staticmethod
-    def debug(message):
-        # Cyan for DEBUG
-        print(Log._format("  DEBUG", message, "\033[96m"), flush=True)
+    def debug(message, *args):
+        _logger.debug(message, *args)
@@ -1,16 +1,23 @@
 import random
 from datetime import datetime
+import pytz
+
+_IST = pytz.timezone('Asia/Kolkata')
 
 class SEOManager:
     @staticmethod
-    def generate_caption(keywords: list[str], hashtags: list[str], quote: str, reminder_body: str = None, engaging_body: str = None):
+    def generate_caption(keywords: list[str] | str, hashtags: list[str] | str, quote: str, reminder_body: str = None, engaging_body: str = None):
         """
         Generates an SEO-optimized caption for Instagram.
         Prioritizes dynamic engaging content over template-based reminders.
+        Keywords and hashtags may be passed pre-joined (see settings.keywords_str).
         """
-        import pytz
-        ist = pytz.timezone('Asia/Kolkata')
-        date_str = datetime.now(ist).strftime('%A, %B %d, %Y')
+        if not isinstance(hashtags, str):
+            hashtags = ' '.join(hashtags)
+        if not isinstance(keywords, str):
+            keywords = ', '.join(keywords)
+
+        date_str = datetime.now(_IST).strftime('%A, %B %d, %Y')
         
         # Build the caption
         header_hook = f"✨ {quote} ✨"
@@ -29,8 +36,8 @@ class SEOManager:
             f"{header_hook}\n\n"
             f"{main_content}\n\n"
             f"---\n\n"
-            f"{' '.join(hashtags)}\n\n"
-            f"Keywords: {', '.join(keywords)}"
+            f"{hashtags}\n\n"
+            f"Keywords: {keywords}"
         )
         return caption.strip()
 
@@ -1,26 +1,53 @@
-import markdown
-from bs4 import BeautifulSoup
+import re
 
-def strip_markdown(markdown_text: str) -> str:
+# Single-pass markdown stripper for the short captions Groq returns
+_MD_RE = re.compile(
+    r"\[([^\]]+)\]\([^)]+\)"  # [text](url) -> text
+    r"|^[ \t]*#{1,6}[ \t]+"  # headings (hashtags like #love have no space)
+    r"|^[ \t]*>[ \t]?"  # blockquotes
+    r"|^[ \t]*(?:[-*+]|\d+\.)[ \t]+"  # list markers
+    r"|\*\*|__|~~|`"  # bold, strikethrough, code
+    r"|(?<!\w)[*_](?=\S)|(?<=\S)[*_](?!\w)",  # italics, but not snake_case
+    re.MULTILINE,
+)
+
+_HTML_RE = re.compile(r"<[a-zA-Z/][^>]*>")
+
+
+def _strip_markdown_html(markdown_text: str) -> str:
     """
-    Converts markdown to plain text using a combination of markdown and 
-    BeautifulSoup libraries.
+    Converts markdown to plain text using a combination of markdown and
+    BeautifulSoup libraries. Only used when the text contains raw HTML.
     """
-    if not markdown_text:
-        return ""
-        
+    import markdown
+    from bs4 import BeautifulSoup
+
     # Convert markdown to HTML
     html = markdown.markdown(markdown_text)
 
     # Parse the HTML and extract the plain text
     soup = BeautifulSoup(html, features="html.parser")
-    plain_text = soup.get_text()
+    return soup.get_text()
+
+
+def strip_markdown(markdown_text: str) -> str:
+    """
+    Converts markdown to plain text with a precompiled regex, falling back
+    to markdown + BeautifulSoup for input containing HTML tags.
+    """
+    if not markdown_text:
+        return ""
+
+    if _HTML_RE.search(markdown_text):
+        plain_text = _strip_markdown_html(markdown_text)
+    else:
+        plain_text = _MD_RE.sub(lambda m: m.group(1) or "", markdown_text)
 
     # Aggressively strip whitespace from EACH line
     lines = [line.strip() for line in plain_text.splitlines()]
-    
-    # Rejoin lines, ensuring we don't end up with more than 2 consecutive newlines for aesthetics
-    result = "\n\n".join(lines)
-    
+
+    # Rejoin non-empty lines as paragraphs for aesthetics
+    result = "\n\n".join(line for line in lines if line)
+
     # Final cleanup of leading/trailing block whitespace
     return result.strip()
@@ -1,178 +1,736 @@
+import hashlib
+import json
 import os
-from moviepy.editor import (
-    VideoFileClip,
-    TextClip,
-    CompositeVideoClip,
-    vfx,
-    AudioFileClip,
-    afx,
-    ColorClip,
-)
-from moviepy.config import change_settings
+from pathlib import Path
+import platform
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+from collections import deque
 from src.core.logger import Log
-import PIL.Image
+from src.config.settings import settings
 
-# Fix for Pillow 10+ compatibility with MoviePy 1.0.3
-if not hasattr(PIL.Image, "ANTIALIAS"):
-    PIL.Image.ANTIALIAS = PIL.Image.Resampling.LANCZOS
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+FFPROBE_BINARY = os.getenv("FFPROBE_BINARY", "ffprobe")
 
-if os.getenv("IMAGEMAGICK_BINARY"):
-    change_settings({"IMAGEMAGICK_BINARY": os.getenv("IMAGEMAGICK_BINARY")})
+# Instagram Reels canvas (9:16)
+TARGET_W, TARGET_H = 1080, 1920
 
+HEADER_TEXT = "(READ CAPTION)"
 
-def add_text_to_video(
-    input_video_path,
-    output_video_path,
-    quote_text,
-    font_size,
-    color="white",
-    audio_path=None,
-):
+_moviepy = None
+
+# Rendered TextClip PNGs, reused across runs to skip ImageMagick
+TEXT_CACHE_DIR = os.getenv(
+    "TEXT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "textclip_cache")
+)
+
+# Seconds between ffmpeg progress log lines
+PROGRESS_LOG_INTERVAL = 5
+
+# Quote-independent part of the look: darken by 70% and cover a 1080x1920 frame
+BASE_FILTERS = [
+    "colorchannelmixer=rr=0.3:gg=0.3:bb=0.3",
+    f"scale={TARGET_W}:{TARGET_H}:force_original_aspect_ratio=increase",
+    f"crop={TARGET_W}:{TARGET_H}",
+]
+
+# H.264 encoders in order of preference, with their Reel-quality settings
+VIDEO_ENCODERS = {
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "6M", "-maxrate", "8M"],
+    "h264_qsv": ["-preset", "veryfast", "-b:v", "6M", "-maxrate", "8M"],
+    "h264_videotoolbox": ["-b:v", "6M", "-realtime", "1"],
+    "libx264": ["-preset", "ultrafast"],
+}
+
+_video_encoder = None
+
+
+def _encoder_args(encoder, preset=None):
+    """Reel-quality args for `encoder`, with `preset` overriding libx264's"""
+    args = list(VIDEO_ENCODERS.get(encoder, []))
+    if preset and encoder == "libx264":
+        args[args.index("-preset") + 1] = preset
+    return args
+
+
+def _encoder_works(encoder):
+    """Encodes a single blank frame to check the encoder is actually usable"""
+    cmd = [
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=black:s=256x256",
+        "-frames:v", "1",
+        "-c:v", encoder,
+        "-pix_fmt", "yuv420p",
+        "-f", "null", "-",
+    ]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def _select_video_encoder():
     """
-    Overlays a single centered quote on a video template and optionally replaces audio.
+    Picks a hardware H.264 encoder when ffmpeg has one that works on this
+    machine, otherwise libx264. Set VIDEO_ENCODER to force a specific one.
+    The probe result is cached for the life of the process.
     """
+    global _video_encoder
+    if _video_encoder:
+        return _video_encoder
+
+    forced = os.getenv("VIDEO_ENCODER")
+    if forced:
+        _video_encoder = forced
+        return _video_encoder
+
     try:
-        Log.info(f"Loading template: {input_video_path}")
-        if not os.path.exists(str(input_video_path)):
-            Log.error(f"Template file not found: {input_video_path}")
-            return False
+        listing = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        listing = ""
 
-        video = VideoFileClip(str(input_video_path)).fx(
-            vfx.colorx, 0.3
-        )  # Darken video by 70%
+    candidates = ["h264_nvenc", "h264_qsv"]
+    if platform.system() == "Darwin":
+        candidates.insert(0, "h264_videotoolbox")
 
-        # Handle Audio Replacement
-        if audio_path and os.path.exists(str(audio_path)):
-            Log.info(f"Replacing audio with: {audio_path}")
-            audio = AudioFileClip(str(audio_path))
+    _video_encoder = "libx264"
+    for encoder in candidates:
+        if encoder in listing and _encoder_works(encoder):
+            _video_encoder = encoder
+            break
 
-            # If audio is shorter than video, loop it
-            if audio.duration < video.duration:
-                audio = afx.audio_loop(audio, duration=video.duration)
-            else:
-                # Truncate audio to match video duration
-                audio = audio.set_duration(video.duration)
+    Log.info(f"Using video encoder: {_video_encoder}")
+    return _video_encoder
 
-            video = video.set_audio(audio)
-        else:
-            Log.info("Using original video audio.")
 
-        Log.info("Creating quote clip")
+def probe_video(video_path):
+    """
+    Reads duration, resolution and fps of the first video stream with ffprobe,
+    without decoding any frames. Returns a dict, or None if probing fails.
+    """
+    cmd = [
+        FFPROBE_BINARY, "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,r_frame_rate,duration:format=duration",
+        "-of", "json",
+        str(video_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        Log.warning(f"ffprobe failed: {result.stderr.strip()}")
+        return None
 
-        # Cross-platform font detection for Times New Roman
-        font_choices = [
-            "/System/Library/Fonts/Supplemental/Times New Roman.ttf",  # MacOS
-            "/usr/share/fonts/truetype/msttcorefonts/Times_New_Roman.ttf",  # Linux
-            "Times-New-Roman",  # ImageMagick Alias
-            "DejaVu-Serif",  # Safety fallback
-        ]
-        selected_font = "Times-New-Roman"
-        for f in font_choices:
-            if os.path.exists(f) or not f.startswith("/"):
-                selected_font = f
-                break
+    data = json.loads(result.stdout)
+    streams = data.get("streams") or [{}]
+    stream = streams[0]
+    # r_frame_rate is a fraction such as "30000/1001"
+    num, _, den = stream.get("r_frame_rate", "0/1").partition("/")
+    den = float(den or 1)
+    duration = stream.get("duration") or data.get("format", {}).get("duration")
+    return {
+        "width": int(stream.get("width", 0)),
+        "height": int(stream.get("height", 0)),
+        "fps": round(float(num) / den, 3) if den else 0.0,
+        "duration": float(duration) if duration else 0.0,
+    }
 
-        # Centered Quote Text Clip
-        quote_clip = (
-            TextClip(
-                f'"{quote_text}"',
-                fontsize=55,
-                color=color,
-                method="caption",
-                font=selected_font,
-                size=(int(video.w * 0.9), None),
-            )
-            .set_duration(video.duration)
-            .set_position("center")
+
+def _audio_is_reel_ready(media_path):
+    """
+    True when the first audio stream already meets the Reel audio spec (AAC-LC,
+    >= 128kbps, <= 48kHz, mono/stereo), so it can be stream-copied instead of
+    decoded and re-encoded.
+    """
+    cmd = [
+        FFPROBE_BINARY, "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,profile,sample_rate,bit_rate,channels",
+        "-of", "json",
+        str(media_path),
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        streams = json.loads(result.stdout or "{}").get("streams") or []
+        if not streams:
+            return False
+        stream = streams[0]
+        return (
+            stream.get("codec_name") == "aac"
+            and stream.get("profile") == "LC"
+            and int(stream.get("bit_rate") or 0) >= 128000
+            and int(stream.get("sample_rate") or 0) <= 48000
+            and 0 < int(stream.get("channels") or 0) <= 2
         )
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return False
 
-        # Header Clip (READ CAPTION) - placed above the quote
-        header_clip = (
-            TextClip(
-                "(READ CAPTION)",
-                fontsize=30,
-                color=color,
-                font=selected_font,
-            )
-            .set_duration(video.duration)
-            .set_position(("center", video.h / 2 - quote_clip.h / 2 - 80))
+
+def _escape_filter_value(value):
+    """
+    Escapes a value for use as a filter option inside -filter_complex.
+    FFmpeg unescapes twice: once for the option value, once for the graph.
+    """
+    value = str(value)
+    for char in "\\':":
+        value = value.replace(char, "\\" + char)
+    return "".join("\\" + c if c in "\\'[],;" else c for c in value)
+
+
+def _drawtext(text, font, font_size, color, y):
+    """Builds a horizontally centered drawtext filter for a single line"""
+    if font.startswith("/"):
+        font_opt = f"fontfile={_escape_filter_value(font)}"
+    else:
+        # ImageMagick aliases use dashes, fontconfig expects the family name
+        font_opt = f"font={_escape_filter_value(font.replace('-', ' '))}"
+    return (
+        f"drawtext={font_opt}"
+        f":text={_escape_filter_value(text)}"
+        f":expansion=none"
+        f":fontsize={font_size}"
+        f":fontcolor={_escape_filter_value(color)}"
+        f":x=(w-text_w)/2"
+        f":y={int(y)}"
+    )
+
+
+def _wrap_quote(text, font, font_size, max_width):
+    """
+    Wraps the quote the way TextClip(method="caption") would. Line widths are
+    measured with the actual font when it's a file, otherwise estimated from
+    an average glyph width of half the font size.
+    """
+    if font.startswith("/"):
+        try:
+            from PIL import ImageFont
+
+            pil_font = ImageFont.truetype(font, font_size)
+            lines = []
+            for word in text.split():
+                candidate = f"{lines[-1]} {word}" if lines else word
+                if lines and pil_font.getlength(candidate) <= max_width:
+                    lines[-1] = candidate
+                else:
+                    lines.append(word)
+            return lines or [text]
+        except Exception as e:
+            Log.warning(f"Could not measure text with {font}: {e}")
+
+    max_chars = max(1, int(max_width / (font_size * 0.5)))
+    return textwrap.wrap(text, width=max_chars) or [text]
+
+
+def _run_ffmpeg(cmd, label):
+    """
+    Runs an ffmpeg command, logging -progress output as it arrives.
+    stderr is drained on a separate thread so the pipe never fills up.
+    """
+    Log.info(f"Running ffmpeg ({label})...")
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
         )
+    except OSError as e:
+        # No system ffmpeg (MoviePy ships its own via imageio-ffmpeg)
+        Log.error(f"Could not start ffmpeg ({label}): {e}")
+        return False
 
-        Log.info(f"Using font: {selected_font}")
-        Log.info("Compositing video...")
-        
-        # Ensure 9:16 aspect ratio (1080x1920) for Instagram Reels
-        target_w, target_h = 1080, 1920
-        
-        # We always want a 1080x1920 output. 
-        # We'll scale and crop the template to "cover" the frame.
-        Log.info(f"Ensuring output dimensions: {target_w}x{target_h}")
-        
-        # Calculate scale to cover the target dimensions
-        scale = max(target_w / video.w, target_h / video.h)
-        resized_video = video.resize(scale)
-        
-        # Crop the center to fit target dimensions
-        # crop expects (x1, y1, x2, y2) or center=(x,y) + width, height
-        video_covered = resized_video.crop(
-            x_center=resized_video.w / 2,
-            y_center=resized_video.h / 2,
-            width=target_w,
-            height=target_h
+    stderr_tail = deque(maxlen=20)
+
+    def _drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip())
+
+    stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    # ffmpeg reports progress every 0.5s; only log it every few seconds
+    out_time = None
+    last_logged = 0.0
+    for line in process.stdout:
+        key, _, value = line.strip().partition("=")
+        if key == "out_time":
+            out_time = value
+        elif key == "progress" and out_time:
+            now = time.monotonic()
+            if value == "end" or now - last_logged >= PROGRESS_LOG_INTERVAL:
+                last_logged = now
+                Log.info(f"{label} progress: {out_time.split('.')[0]}")
+
+    process.wait()
+    stderr_thread.join()
+
+    if process.returncode != 0:
+        Log.error(f"ffmpeg ({label}) exited with code {process.returncode}")
+        for line in stderr_tail:
+            Log.error(f"ffmpeg: {line}")
+        return False
+    return True
+
+
+def thumbnail_path_for(output_video_path):
+    """Path of the JPEG cover written next to a rendered reel"""
+    return f"{output_video_path}.jpg"
+
+
+def _save_thumbnail(output_video_path):
+    """Extracts the frame at 1s of an already rendered reel as a JPEG cover"""
+    thumbnail_path = thumbnail_path_for(output_video_path)
+    Log.info(f"Saving cover frame to: {thumbnail_path}")
+    cmd = [
+        FFMPEG_BINARY, "-y", "-hide_banner", "-nostats",
+        "-ss", "1",
+        "-i", str(output_video_path),
+        "-frames:v", "1",
+        "-q:v", "2",
+        "-progress", "pipe:1",
+        thumbnail_path,
+    ]
+    return _run_ffmpeg(cmd, "thumbnail")
+
+
+def _prepared_path(source):
+    return source.with_name(f"{source.stem}_{TARGET_W}x{TARGET_H}_dark.mp4")
+
+
+def cached_template(input_video_path):
+    """
+    Returns the prepared template if one exists and is newer than the source,
+    otherwise None. Never encodes: building the cache costs more than a
+    single-pass render, so it is only done ahead of time (see Dockerfile).
+    """
+    source = Path(input_video_path)
+    prepared = _prepared_path(source)
+    if (
+        source.exists()
+        and prepared.exists()
+        and prepared.stat().st_mtime >= source.stat().st_mtime
+    ):
+        return prepared
+    return None
+
+
+def prepare_template(input_video_path):
+    """
+    Renders BASE_FILTERS over the template once and caches the result beside
+    it, so later renders only draw text. Run at image build time; the cache is
+    rebuilt whenever the source template is newer. Returns the prepared path,
+    or None on failure.
+    """
+    source = Path(input_video_path)
+    if not source.exists():
+        Log.error(f"Template file not found: {input_video_path}")
+        return None
+
+    prepared = cached_template(source)
+    if prepared:
+        return prepared
+    prepared = _prepared_path(source)
+
+    Log.info(f"Preparing template: {source} -> {prepared}")
+    tmp_path = prepared.with_name(f"{prepared.stem}.{os.getpid()}.tmp.mp4")
+    cmd = [
+        FFMPEG_BINARY, "-y", "-hide_banner", "-nostats",
+        "-i", str(source),
+        "-vf", ",".join(BASE_FILTERS),
+        # One-time encode, so spend the CPU on quality to avoid generation loss
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", "18",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "copy",
+        "-progress", "pipe:1",
+        str(tmp_path),
+    ]
+    try:
+        if not _run_ffmpeg(cmd, "prepare template"):
+            return None
+        os.replace(tmp_path, prepared)
+    except Exception as e:
+        Log.error(f"Failed to prepare template: {e}")
+        return None
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return prepared
+
+
+def _render_with_ffmpeg(
+    input_video_path, output_video_path, quote_text, font_size, color, audio_path,
+    prepared=False, overlay=None, threads=None, preset=None,
+):
+    """
+    Renders the reel in a single ffmpeg pass: darken, cover-crop to 1080x1920,
+    draw the quote and header, mux the audio and encode to Reel specifications.
+    With `prepared`, the input is already darkened and cropped and only the
+    text is drawn. With `overlay`, a (png_path, y) tuple, the pre-rendered
+    caption PNG is overlaid instead of using drawtext.
+    """
+    inputs = ["-i", str(input_video_path)]
+    base = "" if prepared else ",".join(BASE_FILTERS)
+
+    if overlay:
+        overlay_path, overlay_y = overlay
+        inputs += ["-loop", "1", "-i", str(overlay_path)]
+        filter_graph = (
+            f"[0:v]{base or 'null'}[bg];"
+            f"[bg][1:v]overlay=x=(W-w)/2:y={int(overlay_y)}:shortest=1"
         )
+    else:
+        selected_font = settings.reel_font
+        Log.info(f"Using font: {selected_font}")
 
-        # Composite everything on a 1080x1920 canvas
-        video_with_text = CompositeVideoClip([
-            video_covered, 
-            quote_clip.set_position("center"), 
-            header_clip.set_position(("center", target_h / 2 - quote_clip.h / 2 - 80))
-        ], size=(target_w, target_h))
+        # Quote block is centered, the header sits 80px above its first line
+        lines = _wrap_quote(f'"{quote_text}"', selected_font, font_size, TARGET_W * 0.9)
+        line_height = int(font_size * 1.2)
+        quote_top = (TARGET_H - line_height * len(lines)) / 2
+        text_filters = [
+            _drawtext(HEADER_TEXT, selected_font, 30, color, quote_top - 80)
+        ]
+        for i, line in enumerate(lines):
+            text_filters.append(
+                _drawtext(line, selected_font, font_size, color, quote_top + i * line_height)
+            )
+        filter_graph = "[0:v]" + ",".join(([base] if base else []) + text_filters)
 
-        Log.info(f"Writing output video to: {output_video_path}")
+    filter_graph += "[v]"
+
+    if audio_path and os.path.exists(str(audio_path)):
+        Log.info(f"Replacing audio with: {audio_path}")
+        # Loop the track and let -shortest cut it to the video duration
+        audio_index = 2 if overlay else 1
+        inputs += ["-stream_loop", "-1", "-i", str(audio_path)]
+        audio_map = ["-map", f"{audio_index}:a:0", "-shortest"]
+        audio_source = audio_path
+    else:
+        Log.info("Using original video audio.")
+        audio_map = ["-map", "0:a?"]
+        audio_source = input_video_path
+
+    if _audio_is_reel_ready(audio_source):
+        Log.info("Audio is already AAC, copying it without re-encoding.")
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_args = [
+            "-c:a", "aac",
+            "-b:a", "128k",  # 128kbps audio bitrate
+            "-ar", "44100",  # Standard sample rate (max 48k)
+        ]
+
+    Log.info(f"Writing output video to: {output_video_path}")
+    encoder = _select_video_encoder()
+    encoders = [encoder] if encoder == "libx264" else [encoder, "libx264"]
+    for encoder in encoders:
         # Instagram Reel Specifications:
         # - H.264 video codec
         # - AAC audio codec @ 128kbps
         # - moov atom at the front (-movflags +faststart)
         # - 4:2:0 chroma subsampling
-        # - threads=1 and preset='ultrafast' for Railway stability
-        video_with_text.write_videofile(
+        # Hardware encoders usually come with a matching decoder; frames are
+        # still downloaded for the filters, so only the decode moves to the GPU
+        hwaccel = [] if encoder == "libx264" else ["-hwaccel", "auto"]
+        render_cmd = [FFMPEG_BINARY, "-y", "-hide_banner", "-nostats", *hwaccel] + inputs + [
+            "-filter_complex", filter_graph,
+            "-map", "[v]",
+            *audio_map,
+            "-c:v", encoder,
+            *_encoder_args(encoder, preset),
+            *(["-threads", str(threads)] if threads else []),
+            "-pix_fmt", "yuv420p",  # 4:2:0 chroma subsampling
+            "-movflags", "+faststart",  # moov atom at the front
+            *audio_args,
+            "-progress", "pipe:1",
             str(output_video_path),
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile="temp-audio.m4a",
-            remove_temp=True,
-            verbose=True,
-            logger="bar",
-            preset="ultrafast",
-            ffmpeg_params=[
-                "-pix_fmt",
-                "yuv420p",  # 4:2:0 chroma subsampling
-                "-movflags",
-                "+faststart",  # moov atom at the front
-                "-b:a",
-                "128k",  # 128kbps audio bitrate
-                "-ar",
-                "44100",  # Standard sample rate (max 48k)
-            ],
-        )
+        ]
+        if _run_ffmpeg(render_cmd, f"render/{encoder}"):
+            break
+        if encoder != "libx264":
+            Log.warning(f"{encoder} encode failed, retrying with libx264...")
+    else:
+        return False
 
-        # Save a frame as a thumbnail (middle of the video)
-        # JPEG Format, sRGB Color Space (PIL default), 9:16 recommended
-        thumbnail_path = f"{output_video_path}.jpg"
-        Log.info(f"Saving cover frame to: {thumbnail_path}")
-        try:
-            from PIL import Image
+    # The cover is a separate, seek-and-decode-one-frame step: a second
+    # output in the render command would hold -progress out_time at the
+    # JPEG's single frame for the whole encode
+    if not _save_thumbnail(output_video_path):
+        Log.warning("Failed to save the cover frame, posting without one.")
+    return True
+
+
+def _load_moviepy():
+    """
+    Imports MoviePy on first use. Only the fallback renderer needs it, so the
+    ffmpeg path and --dry-run never pay for the MoviePy/numpy/imageio stack.
+    """
+    global _moviepy
+    if _moviepy is None:
+        import PIL.Image
+        import moviepy.editor
+        from moviepy.config import change_settings
+
+        # Fix for Pillow 10+ compatibility with MoviePy 1.0.3
+        if not hasattr(PIL.Image, "ANTIALIAS"):
+            PIL.Image.ANTIALIAS = PIL.Image.Resampling.LANCZOS
+
+        if os.getenv("IMAGEMAGICK_BINARY"):
+            change_settings({"IMAGEMAGICK_BINARY": os.getenv("IMAGEMAGICK_BINARY")})
+
+        _moviepy = moviepy.editor
+    return _moviepy
+
+
+def _cache_path(*key):
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(TEXT_CACHE_DIR, f"{digest}.png")
+
+
+def _cached_text_png(text, fontsize, color, font, size=None, method="label"):
+    """
+    Returns the path of the rendered text PNG, only invoking ImageMagick when
+    this (text, font, size, color) combination hasn't been rendered before.
+    """
+    path = _cache_path(text, fontsize, color, font, size, method)
+    if os.path.exists(path):
+        Log.info(f"Using cached text render: {path}")
+        return path
+
+    mp = _load_moviepy()
+    os.makedirs(TEXT_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.png"
+    clip = mp.TextClip(
+        text,
+        fontsize=fontsize,
+        color=color,
+        method=method,
+        font=font,
+        size=size,
+        tempfilename=tmp_path,
+        remove_temp=False,
+    )
+    clip.close()
+    # Publish atomically so a concurrent run never reads a partial PNG
+    os.replace(tmp_path, path)
+    return path
+
+
+def _cached_caption_png(quote_text, fontsize, color, font, width):
+    """
+    Pre-composites the header and the wrapped quote into one RGBA PNG, so the
+    caption is a single static layer. Returns (png_path, quote_height); the
+    header sits 80px above the top of the quote.
+    """
+    from PIL import Image
 
-            # get_frame returns an RGB numpy array
-            frame = video_with_text.get_frame(1)
-            img = Image.fromarray(frame)
-            img.convert("RGB").save(
-                thumbnail_path, "JPEG", quality=95, icc_profile=None
+    quote_png = _cached_text_png(
+        f'"{quote_text}"', fontsize, color, font, (width, None), "caption"
+    )
+    header_png = _cached_text_png(HEADER_TEXT, 30, color, font)
+
+    with Image.open(quote_png) as quote, Image.open(header_png) as header:
+        quote_h = quote.height
+        path = _cache_path("overlay", quote_png, header_png)
+        if not os.path.exists(path):
+            canvas = Image.new(
+                "RGBA", (max(quote.width, header.width), quote_h + 80), (0, 0, 0, 0)
             )
-        except Exception as te:
-            Log.warning(
-                f"Failed to save thumbnail via PIL: {te}. Trying fallback save_frame."
+            canvas.alpha_composite(
+                header.convert("RGBA"), ((canvas.width - header.width) // 2, 0)
             )
+            canvas.alpha_composite(
+                quote.convert("RGBA"), ((canvas.width - quote.width) // 2, 80)
+            )
+            tmp_path = f"{path[:-4]}.{os.getpid()}.tmp.png"
+            canvas.save(tmp_path)
+            os.replace(tmp_path, path)
+
+    return path, quote_h
+
+
+def _render_with_overlay(
+    input_video_path, output_video_path, quote_text, font_size, color, audio_path,
+    prepared=False, threads=None, preset=None,
+):
+    """
+    Rasterizes the caption once with ImageMagick and overlays the PNG in
+    ffmpeg, for builds without drawtext. Decode, compositing and encode all
+    stay inside ffmpeg's threaded pipeline instead of MoviePy's frame loop.
+    """
+    try:
+        selected_font = settings.reel_font
+        Log.info(f"Using font: {selected_font}")
+        overlay_path, quote_h = _cached_caption_png(
+            quote_text, font_size, color, selected_font, int(TARGET_W * 0.9)
+        )
+        return _render_with_ffmpeg(
+            input_video_path,
+            output_video_path,
+            quote_text,
+            font_size,
+            color,
+            audio_path,
+            prepared=prepared,
+            overlay=(overlay_path, TARGET_H / 2 - quote_h / 2 - 80),
+            threads=threads,
+            preset=preset,
+        )
+    except Exception as e:
+        Log.error(f"ffmpeg overlay render failed: {e}")
+        return False
+
+
+def load_template(input_video_path, audio_path=None):
+    """
+    Loads the template with MoviePy, darkens it, optionally replaces its audio
+    and covers a 1080x1920 frame.
+
+    Returns a (source_clip, covered_clip) tuple, or None if the template is missing.
+    """
+    Log.info(f"Loading template: {input_video_path}")
+    if not os.path.exists(str(input_video_path)):
+        Log.error(f"Template file not found: {input_video_path}")
+        return None
+
+    mp = _load_moviepy()
+    video = mp.VideoFileClip(str(input_video_path)).fx(
+        mp.vfx.colorx, 0.3
+    )  # Darken video by 70%
+
+    # Handle Audio Replacement
+    if audio_path and os.path.exists(str(audio_path)):
+        Log.info(f"Replacing audio with: {audio_path}")
+        audio = mp.AudioFileClip(str(audio_path))
+
+        # If audio is shorter than video, loop it
+        if audio.duration < video.duration:
+            audio = mp.afx.audio_loop(audio, duration=video.duration)
+        else:
+            # Truncate audio to match video duration
+            audio = audio.set_duration(video.duration)
+
+        video = video.set_audio(audio)
+    else:
+        Log.info("Using original video audio.")
+
+    # Ensure 9:16 aspect ratio (1080x1920) for Instagram Reels
+    Log.info(f"Ensuring output dimensions: {TARGET_W}x{TARGET_H}")
+
+    # We always want a 1080x1920 output.
+    # We'll scale and crop the template to "cover" the frame.
+    scale = max(TARGET_W / video.w, TARGET_H / video.h)
+    resized_video = video.resize(scale)
+
+    # Crop the center to fit target dimensions
+    # crop expects (x1, y1, x2, y2) or center=(x,y) + width, height
+    video_covered = resized_video.crop(
+        x_center=resized_video.w / 2,
+        y_center=resized_video.h / 2,
+        width=TARGET_W,
+        height=TARGET_H
+    )
+    return video, video_covered
+
+
+def _render_with_moviepy(
+    input_video_path, output_video_path, quote_text, font_size, color, audio_path,
+    threads=None, preset=None,
+):
+    """
+    MoviePy + ImageMagick renderer, kept as a fallback for ffmpeg builds
+    without drawtext support.
+    """
+    try:
+        template = load_template(input_video_path, audio_path)
+        if template is None:
+            return False
+        video, video_covered = template
+        mp = _load_moviepy()
+
+        Log.info("Creating quote clip")
+        selected_font = settings.reel_font
+
+        # Header (READ CAPTION) above the centered quote, as one static layer
+        overlay_path, quote_h = _cached_caption_png(
+            quote_text,
+            fontsize=55,
+            color=color,
+            font=selected_font,
+            width=int(video.w * 0.9),
+        )
+        overlay_clip = (
+            mp.ImageClip(overlay_path)
+            .set_duration(video.duration)
+            .set_position(("center", TARGET_H / 2 - quote_h / 2 - 80))
+        )
+
+        Log.info(f"Using font: {selected_font}")
+        Log.info("Compositing video...")
+
+        # Composite everything on a 1080x1920 canvas
+        video_with_text = mp.CompositeVideoClip(
+            [video_covered, overlay_clip], size=(TARGET_W, TARGET_H)
+        )
+
+        Log.info(f"Writing output video to: {output_video_path}")
+        encoder = _select_video_encoder()
+        encoders = [encoder] if encoder == "libx264" else [encoder, "libx264"]
+        for encoder in encoders:
+            # MoviePy always passes -preset, so split it out of the encoder args
+            encoder_args = _encoder_args(encoder, preset)
+            encoder_preset = "medium"
+            if "-preset" in encoder_args:
+                i = encoder_args.index("-preset")
+                encoder_preset = encoder_args[i + 1]
+                del encoder_args[i:i + 2]
+
+            # Instagram Reel Specifications:
+            # - H.264 video codec
+            # - AAC audio codec @ 128kbps
+            # - moov atom at the front (-movflags +faststart)
+            # - 4:2:0 chroma subsampling
+            # - preset='ultrafast' on libx264 for Railway stability
+            try:
+                video_with_text.write_videofile(
+                    str(output_video_path),
+                    codec=encoder,
+                    audio_codec="aac",
+                    temp_audiofile="temp-audio.m4a",
+                    remove_temp=True,
+                    threads=threads or os.cpu_count(),
+                    logger=None,  # tqdm bar redraws cost more than they tell us
+                    preset=encoder_preset,
+                    ffmpeg_params=encoder_args + [
+                        "-pix_fmt",
+                        "yuv420p",  # 4:2:0 chroma subsampling
+                        "-movflags",
+                        "+faststart",  # moov atom at the front
+                        "-b:a",
+                        "128k",  # 128kbps audio bitrate
+                        "-ar",
+                        "44100",  # Standard sample rate (max 48k)
+                    ],
+                )
+                break
+            except Exception as ee:
+                if encoder == "libx264":
+                    raise
+                Log.warning(f"{encoder} encode failed ({ee}), retrying with libx264...")
+
+        # Pull the cover straight from the encoded file rather than
+        # re-rendering a composited frame through MoviePy
+        if not _save_thumbnail(output_video_path):
+            thumbnail_path = thumbnail_path_for(output_video_path)
+            Log.warning("Failed to save thumbnail via ffmpeg. Trying fallback save_frame.")
             video_with_text.save_frame(thumbnail_path, t=video.duration / 2)
 
         Log.info(
@@ -188,6 +746,68 @@ def add_text_to_video(
         return False
 
 
+def add_text_to_video(
+    input_video_path,
+    output_video_path,
+    quote_text,
+    font_size,
+    color="white",
+    audio_path=None,
+    threads=None,
+    preset=None,
+):
+    """
+    Overlays a single centered quote on a video template and optionally replaces audio.
+    Renders with a single ffmpeg pass, then with a pre-rendered caption overlay,
+    and falls back to MoviePy if both fail.
+    `threads` caps the encoder threads (default: ffmpeg's auto) and `preset`
+    overrides the libx264 preset (default: ultrafast).
+    """
+    if not os.path.exists(str(input_video_path)):
+        Log.error(f"Template file not found: {input_video_path}")
+        return False
+
+    prepared_path = None
+    try:
+        prepared_path = cached_template(input_video_path)
+        if _render_with_ffmpeg(
+            prepared_path or input_video_path,
+            output_video_path,
+            quote_text,
+            font_size,
+            color,
+            audio_path,
+            prepared=prepared_path is not None,
+            threads=threads,
+            preset=preset,
+        ):
+            Log.info("Video generation completed successfully.")
+            return True
+    except Exception as e:
+        Log.error(f"ffmpeg render failed: {e}")
+
+    Log.warning("Retrying with a pre-rendered caption overlay...")
+    if _render_with_overlay(
+        prepared_path or input_video_path,
+        output_video_path,
+        quote_text,
+        font_size,
+        color,
+        audio_path,
+        prepared=prepared_path is not None,
+        threads=threads,
+        preset=preset,
+    ):
+        Log.info("Video generation completed successfully.")
+        return True
+
+    Log.warning("Falling back to MoviePy renderer...")
+    return _render_with_moviepy(
+        input_video_path, output_video_path, quote_text, font_size, color, audio_path,
+        threads=threads, preset=preset,
+    )
+
+
 if __name__ == "__main__":
     # Test script
     import sys
@@ -195,7 +815,6 @@ if __name__ == "__main__":
     sys.path.append(
         os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     )
-    from src.config.settings import settings
 
     add_text_to_video(
         input_video_path=settings.template_path,
@@ -1,16 +1,115 @@
 import json
+import random
+import re
+import threading
+from concurrent.futures import Future
 from groq import Groq
 from pydantic import BaseModel
 from src.config.settings import settings
 from src.core.logger import Log
 from src.core.utils import strip_markdown
 
+# System prompts are static so every call shares a byte-identical prefix
+# that Groq's prompt cache can serve. Keep dynamic text in the user message.
+QUOTE_SYSTEM_PROMPT = (
+    "You are a romantic poet. Generate a unique, short, one-liner romantic quote. "
+    "Output in JSON format with a 'quote' key."
+)
+
+CAPTION_SYSTEM_PROMPT = (
+    "You are a social media strategist for a romantic aesthetic page. "
+    "Create a high-engagement Instagram caption for a Reel based on a quote. "
+    "DO NOT use any markdown formatting like bold (**), italics (*), or bullet points. "
+    "Structure: \n"
+    "1. Emotional hook related to the quote.\n"
+    "2. Short, relatable story or reflection on being intentional in love.\n"
+    "3. A gentle call to action (encouraging a 'Save' for later or 'Share' with a partner).\n"
+    "Keep it aesthetic, vulnerable, and minimalist. Use plain text only. Use line breaks for readability. "
+    "Output in JSON format with a 'caption' key."
+)
+
+_COPY_INSTRUCTIONS = (
+    "You are a romantic poet and a social media strategist for a romantic aesthetic page. "
+    "First generate a unique, short, one-liner romantic quote. "
+    "Then create a high-engagement Instagram caption for a Reel based on that quote. "
+    "DO NOT use any markdown formatting like bold (**), italics (*), or bullet points in the caption. "
+    "Caption structure: \n"
+    "1. Emotional hook related to the quote.\n"
+    "2. Short, relatable story or reflection on being intentional in love.\n"
+    "3. A gentle call to action (encouraging a 'Save' for later or 'Share' with a partner).\n"
+    "Keep it aesthetic, vulnerable, and minimalist. Use plain text only. Use line breaks for readability. "
+)
+
+COPY_SYSTEM_PROMPT = (
+    _COPY_INSTRUCTIONS
+    + "Output in JSON format with a 'quote' key and a 'caption' key."
+)
+
+# Groq's JSON mode can't stream, so the streamed variant uses a line format
+COPY_STREAM_SYSTEM_PROMPT = (
+    _COPY_INSTRUCTIONS
+    + "Output exactly this format and nothing else:\n"
+    "QUOTE: <the quote on a single line>\n"
+    "CAPTION:\n"
+    "<the caption>"
+)
+
+COPY_USER_PROMPT = "Give me a beautiful romantic one-liner for my love, and its caption."
+
+# Rotated through when Groq is unavailable so an outage doesn't post the same reel
+FALLBACK_QUOTES = (
+    "I love you more than words can say. ❤️",
+    "You are my everything. ❤️",
+    "Falling in love with you every single day. ❤️",
+    "Every day I love you more than yesterday.",
+    "Home is wherever I am with you. ❤️",
+    "You are my favorite hello and my hardest goodbye.",
+    "In a world full of maybes, you are my certainty. ❤️",
+    "Loving you is the easiest thing I have ever done.",
+)
+
+_groq_generator = None
+_groq_generator_lock = threading.Lock()
+
+
+def fallback_quote() -> str:
+    """Picks one of FALLBACK_QUOTES at random"""
+    return random.choice(FALLBACK_QUOTES)
+
+
+# A complete QUOTE: line in the partially streamed completion. Tolerates
+# markdown around the label ("**QUOTE:**") and the quote on the next line.
+_QUOTE_LINE_RE = re.compile(r"^[ \t>#*_]*QUOTE[ \t*_]*:[\s*_]*(\S[^\n]*?)[ \t]*\n", re.MULTILINE)
+_CAPTION_LABEL_RE = re.compile(r"^[ \t>#*_]*CAPTION[ \t*_]*:[ \t*_]*", re.MULTILINE)
+
+
+def _copy_messages(system_prompt):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": COPY_USER_PROMPT},
+    ]
+
+
+def _parse_quote_line(match):
+    return strip_markdown(match.group(1)).strip(' \t*_"\u201c\u201d')
+
+
+def _log_cache_usage(usage, label):
+    """Logs how many prompt tokens Groq served from its prompt cache"""
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    Log.info(f"Groq {label}: cached_tokens={cached}/{usage.prompt_tokens}")
+
+
 class GroqQuoteSchema(BaseModel):
     quote: str
 
 class GroqQuoteGenerator:
     def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
+        # The SDK retries 429/5xx itself and honors Groq's retry-after header
+        self.client = Groq(api_key=settings.groq_api_key, max_retries=3)
         self.model = "llama-3.1-8b-instant"
 
     def generate_quote(self):
@@ -19,7 +118,7 @@ class GroqQuoteGenerator:
         """
         if not settings.groq_api_key:
             Log.warning("GROQ_API_KEY not found. Using fallback quote.")
-            return "I love you more than words can say. ❤️"
+            return fallback_quote()
 
         try:
             Log.info("Requesting romantic quote from Groq...")
@@ -27,7 +126,7 @@ class GroqQuoteGenerator:
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a romantic poet. Generate a unique, short, one-liner romantic quote. Output in JSON format with a 'quote' key."
+                        "content": QUOTE_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -37,6 +136,7 @@ class GroqQuoteGenerator:
                 model=self.model,
                 response_format={"type": "json_object"},
             )
+            _log_cache_usage(chat_completion.usage, "quote")
             
             content = chat_completion.choices[0].message.content
             response_data = json.loads(content)
@@ -53,14 +153,14 @@ class GroqQuoteGenerator:
                 quote = str(response_data)
 
             if not quote:
-                quote = "You are my everything. ❤️"
+                quote = fallback_quote()
                 
             Log.info(f"Generated quote: {quote}")
             return quote
 
         except Exception as e:
             Log.error(f"Groq quote generation failed: {e}")
-            return "Falling in love with you every single day. ❤️"
+            return fallback_quote()
 
     def generate_engaging_caption(self, quote: str):
         """
@@ -76,17 +176,7 @@ class GroqQuoteGenerator:
                 messages=[
                     {
                         "role": "system",
-                        "content": (
-                            "You are a social media strategist for a romantic aesthetic page. "
-                            "Create a high-engagement Instagram caption for a Reel based on a quote. "
-                            "DO NOT use any markdown formatting like bold (**), italics (*), or bullet points. "
-                            "Structure: \n"
-                            "1. Emotional hook related to the quote.\n"
-                            "2. Short, relatable story or reflection on being intentional in love.\n"
-                            "3. A gentle call to action (encouraging a 'Save' for later or 'Share' with a partner).\n"
-                            "Keep it aesthetic, vulnerable, and minimalist. Use plain text only. Use line breaks for readability. "
-                            "Output in JSON format with a 'caption' key."
-                        )
+                        "content": CAPTION_SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -96,6 +186,7 @@ class GroqQuoteGenerator:
                 model=self.model,
                 response_format={"type": "json_object"},
             )
+            _log_cache_usage(chat_completion.usage, "caption")
             
             content = chat_completion.choices[0].message.content
             response_data = json.loads(content)
@@ -112,30 +203,150 @@ class GroqQuoteGenerator:
             Log.error(f"Groq caption generation failed: {e}")
             return None
 
-if __name__ == "__main__":
-    from src.config.settings import settings
-    from src.core.logger import Log
-    from src.core.seo import SEOManager
+    def generate_quote_and_caption(self):
+        """
+        Generates the quote and the engaging caption in a single Groq call,
+        saving a round trip over generate_quote + generate_engaging_caption.
+        Falls back to the two separate calls if the combined one fails.
+        Returns a (quote, caption) tuple; caption may be None.
+        """
+        if not settings.groq_api_key:
+            return self.generate_quote(), None
 
-    hashtags: list[str] = [
-        "#viral", "#reels", "#trending", "#fyp", "#explorepage"
-    ]
-    keywords: list[str] = [
-        "love", "romance", "couplegoals", "relationshipgoals", "inlove",
-        "foreverlove", "soulmates", "lovequotes", "romantic", "trueLove",
-        "unconditionallove", "partnerincrime", "happilyeverafter", "heartfelt",
-        "lovebirds", "togetherforever", "mylove", "endlesslove", "powercouple",
-        "romanticvibes", "lovestory", "couplelove", "relationship",
-        "romanticmoments", "deeplyinlove", "trueloveexists", "lovelife",
-        "loveandtrust", "purelove", "couples", "loveforever",
-        "romanticcouple", "loveyou", "heartandsoul", "madeforeachother",
-        "perfectpair", "loveconnection", "intimatelove", "soulconnection",
-        "lovebond", "eternallove", "romanticlife", "lovechemistry",
-        "relationshipvibes", "loveinspiration", "hopelessromantic",
-        "couplevibes", "lovejourney", "romanticfeelings", "inlovewithyou"
-    ]
+        try:
+            Log.info("Requesting romantic quote and caption from Groq...")
+            chat_completion = self.client.chat.completions.create(
+                messages=_copy_messages(COPY_SYSTEM_PROMPT),
+                model=self.model,
+                response_format={"type": "json_object"},
+            )
+            _log_cache_usage(chat_completion.usage, "quote+caption")
+
+            content = chat_completion.choices[0].message.content
+            response_data = json.loads(content)
+            if not isinstance(response_data, dict):
+                raise ValueError(f"unexpected response shape: {type(response_data).__name__}")
+
+            quote = response_data.get("quote")
+            caption = response_data.get("caption", "")
+            if not quote:
+                raise ValueError("response has no quote")
+
+            if caption:
+                caption = strip_markdown(caption)
+
+            Log.info(f"Generated quote: {quote}")
+            Log.success(caption)
+            return quote, caption or None
+
+        except Exception as e:
+            Log.warning(f"Combined Groq generation failed: {e}. Retrying as two calls.")
+            quote = self.generate_quote()
+            return quote, self.generate_engaging_caption(quote)
+
+    def stream_quote_and_caption(self):
+        """
+        Streams the combined quote + caption completion and returns as soon
+        as the quote string is complete, so rendering can start while the
+        caption is still being generated.
+        Returns (quote, caption_future); the future resolves to the caption
+        or None and never raises.
+        """
+        if not settings.groq_api_key:
+            return self._completed_copy(self.generate_quote(), None)
+
+        quote_future, caption_future = Future(), Future()
+        threading.Thread(
+            target=self._consume_copy_stream,
+            args=(quote_future, caption_future),
+            daemon=True,
+        ).start()
+
+        try:
+            return quote_future.result(), caption_future
+        except Exception as e:
+            Log.warning(f"Streaming Groq generation failed: {e}. Retrying without streaming.")
+            return self._completed_copy(*self.generate_quote_and_caption())
 
-    seo_manager = SEOManager()
+    @staticmethod
+    def _completed_copy(quote, caption):
+        caption_future = Future()
+        caption_future.set_result(caption)
+        return quote, caption_future
+
+    def _consume_copy_stream(self, quote_future, caption_future):
+        """Reads the streamed completion, resolving the quote as soon as it closes"""
+        try:
+            Log.info("Streaming romantic quote and caption from Groq...")
+            stream = self.client.chat.completions.create(
+                messages=_copy_messages(COPY_STREAM_SYSTEM_PROMPT),
+                model=self.model,
+                stream=True,
+            )
+
+            content = ""
+            usage = None
+            for chunk in stream:
+                # Groq reports usage on the final chunk, under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                if getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+                if not chunk.choices:
+                    continue
+                content += chunk.choices[0].delta.content or ""
+                if not quote_future.done():
+                    match = _QUOTE_LINE_RE.search(content)
+                    if match:
+                        quote = _parse_quote_line(match)
+                        Log.info(f"Generated quote: {quote}")
+                        quote_future.set_result(quote)
+
+            if not quote_future.done():
+                # The quote line may be the last one, without a trailing newline
+                match = _QUOTE_LINE_RE.search(content + "\n")
+                quote = _parse_quote_line(match) if match else ""
+                if not quote:
+                    raise ValueError("response has no QUOTE: line")
+                Log.info(f"Generated quote: {quote}")
+                quote_future.set_result(quote)
+
+            _log_cache_usage(usage, "quote+caption stream")
+            marker = _CAPTION_LABEL_RE.search(content)
+            caption = content[marker.end():].strip() if marker else ""
+            if caption:
+                caption = strip_markdown(caption)
+                Log.success(caption)
+            caption_future.set_result(caption or None)
+
+        except Exception as e:
+            if not quote_future.done():
+                quote_future.set_exception(e)
+            else:
+                Log.error(f"Groq caption stream failed: {e}")
+                caption_future.set_result(None)
+
+
+def get_groq_generator() -> GroqQuoteGenerator:
+    """Returns a process-wide generator so the Groq HTTP client stays warm"""
+    global _groq_generator
+    if _groq_generator is None:
+        with _groq_generator_lock:
+            if _groq_generator is None:
+                _groq_generator = GroqQuoteGenerator()
+    return _groq_generator
+
+
+if __name__ == "__main__":
+    from src.core.seo import SEOManager
 
-    generator = GroqQuoteGenerator()
-    print(seo_manager.generate_caption(keywords, hashtags, generator.generate_quote()))
\ No newline at end of file
+    # Preview with the same joined keyword/hashtag strings the scheduled job uses
+    generator = get_groq_generator()
+    quote, engaging_caption = generator.generate_quote_and_caption()
+    print(
+        SEOManager.generate_caption(
+            settings.keywords_str,
+            settings.hashtags_str,
+            quote,
+            engaging_body=engaging_caption,
+        )
+    )
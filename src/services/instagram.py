@@ -1,9 +1,45 @@
 import requests
+import random
+import re
+import threading
 import time
 import os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from src.core.logger import Log
 from src.config.settings import settings
 
+# How long a successful token introspection stays valid
+TOKEN_INFO_TTL = 300
+
+# media_publish errors meaning "still processing, try again later"
+MEDIA_NOT_READY_CODES = {9007}
+MEDIA_NOT_READY_SUBCODES = {2207027}
+
+# Graph errors that won't go away by polling: 100 invalid/missing object,
+# 190 expired or invalid token, 10 and 200-299 permissions
+TERMINAL_ERROR_CODES = {10, 100, 190} | set(range(200, 300))
+
+# Hosts Instagram's servers can't reach, so URLs on them can't be fetched
+INTERNAL_URL_RE = re.compile(r"railway\.internal|localhost|127\.0\.0\.1|0\.0\.0\.0")
+
+_ig_client = None
+_ig_client_lock = threading.Lock()
+
+
+class _GraphRetry(Retry):
+    """
+    Retries GETs on 429/5xx and read errors, but POSTs (container creation,
+    media_publish) only on 429: a POST that hit a 5xx or a read timeout may
+    already have been applied, and replaying a publish would double-post.
+    Connection errors are retried for every method since nothing was sent.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return bool(self.total) and status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
 
 class InstagramGraphClient:
     def __init__(self):
@@ -14,6 +50,28 @@ class InstagramGraphClient:
         self.base_url = f"https://graph.facebook.com/{self.api_version}"
         self.upload_url = "https://rupload.facebook.com/ig-api-upload"
 
+        # Share one keep-alive connection pool across every Graph API call so
+        # status polling doesn't pay a fresh TCP+TLS handshake per request.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            # Backoff on throttling and server errors, honoring Instagram's
+            # Retry-After on 429; see _GraphRetry for how POSTs are limited
+            max_retries=_GraphRetry(
+                total=5,
+                backoff_factor=2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(["GET"]),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+
+        self._token_info = None
+        self._token_info_at = 0.0
+
     def _handle_api_error(self, response: requests.Response, context: str):
         """Helper to log detailed error info and handle specific cases like App ID mismatch"""
         Log.error(f"Error during {context}. Status: {response.status_code}")
@@ -36,10 +94,7 @@ class InstagramGraphClient:
             Log.info(f"Initializing URL upload session for Reel: {video_url[:50]}...")
 
             # Diagnostic: Check for internal URLs that Instagram cannot reach
-            is_video_internal = any(
-                x in video_url for x in ["railway.internal", "localhost", "127.0.0.1"]
-            )
-            if is_video_internal:
+            if INTERNAL_URL_RE.search(video_url):
                 Log.error(
                     f"The video_url provided is an internal URL: {video_url}. Instagram will fail to fetch this."
                 )
@@ -57,11 +112,7 @@ class InstagramGraphClient:
             }
 
             if cover_url:
-                is_internal = any(
-                    x in cover_url
-                    for x in ["railway.internal", "localhost", "127.0.0.1"]
-                )
-                if is_internal:
+                if INTERNAL_URL_RE.search(cover_url):
                     Log.warning(
                         "The cover_url provided is an internal URL. Skipping cover_url."
                     )
@@ -70,7 +121,7 @@ class InstagramGraphClient:
                     payload["cover_url"] = cover_url
 
             Log.info(f"Container creation payload: media_type={payload['media_type']}")
-            response = requests.post(url, params=params, data=payload)
+            response = self.session.post(url, params=params, data=payload)
 
             if not response.ok:
                 self._handle_api_error(response, "URL upload initialization")
@@ -101,7 +152,7 @@ class InstagramGraphClient:
                 "caption": caption,
             }
 
-            response = requests.post(url, params=params, data=payload)
+            response = self.session.post(url, params=params, data=payload)
 
             if not response.ok:
                 self._handle_api_error(response, "Image upload initialization")
@@ -123,7 +174,7 @@ class InstagramGraphClient:
     ) -> str:
         """
         Uploads a reel using the resumable upload protocol (binary upload).
-        Handles chunked streaming for reliability and performance.
+        Streams the file from disk and resumes from the server offset on failure.
         """
         try:
             # Step 1: Initialize Upload Session
@@ -140,15 +191,11 @@ class InstagramGraphClient:
             }
 
             if cover_url:
-                is_internal = any(
-                    x in cover_url
-                    for x in ["railway.internal", "localhost", "127.0.0.1"]
-                )
-                if not is_internal:
+                if not INTERNAL_URL_RE.search(cover_url):
                     Log.info(f"Setting cover image from: {cover_url}")
                     init_payload["cover_url"] = cover_url
 
-            response = requests.post(init_url, data=init_payload, params=params)
+            response = self.session.post(init_url, data=init_payload, params=params)
             if not response.ok:
                 self._handle_api_error(response, "binary upload initialization")
             response.raise_for_status()
@@ -165,10 +212,10 @@ class InstagramGraphClient:
 
             Log.info(f"Upload session initialized. Container ID: {container_id}")
 
-            # Step 2: Upload Binary Data using chunked streaming
+            # Step 2: Stream Binary Data straight from disk
             file_size = os.path.getsize(video_path)
             Log.info(
-                f"Uploading binary data ({file_size / (1024 * 1024):.2f} MB) in chunks..."
+                f"Uploading binary data ({file_size / (1024 * 1024):.2f} MB)..."
             )
 
             # Match the official documentation exactly:
@@ -182,101 +229,44 @@ class InstagramGraphClient:
                 "X-FB-App-ID": self.app_id,
             }
 
-            # Use a chunk size of 4MB (Instagram recommends between 1MB and 1GB)
-            chunk_size = 4 * 1024 * 1024
             offset = 0
+            max_attempts = 3
 
             with open(video_path, "rb") as f:
-                while offset < file_size:
-                    # Check server offset to handle potential state loss
-                    if offset > 0:
-                        try:
-                            # Resumable protocol: check current offset
-                            check_res = requests.get(
-                                upload_uri,
-                                headers={
-                                    "Authorization": f"OAuth {self.access_token}",
-                                    "X-FB-App-ID": self.app_id,
-                                },
-                                timeout=10,
-                            )
-                            if check_res.ok:
-                                server_offset = int(
-                                    check_res.json().get("offset", offset)
-                                )
-                                if server_offset != offset:
-                                    Log.warning(
-                                        f"Offset mismatch! Local: {offset}, Server: {server_offset}. Adjusting..."
-                                    )
-                                    offset = server_offset
-                                    f.seek(offset)
-                        except Exception as check_err:
-                            Log.warning(f"Failed to check server offset: {check_err}")
-
+                for attempt in range(max_attempts):
+                    # Passing the file object lets requests stream it in small
+                    # blocks with Content-Length set to the remaining size,
+                    # instead of holding the video in memory. Throttling is
+                    # retried by the adapter; 5xx resume from the server offset.
                     f.seek(offset)
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-
                     headers["offset"] = str(offset)
-
-                    for attempt in range(3):
-                        try:
-                            # Perform the chunk upload POST
-                            response = requests.post(
-                                upload_uri, headers=headers, data=chunk, timeout=60
-                            )
-                            if response.ok:
-                                break
-
-                            # Handle OffsetInvalidError by checking server offset
-                            if (
-                                response.status_code == 412
-                                or "OffsetInvalidError" in response.text
-                            ):
-                                Log.warning(
-                                    f"Offset error detected. Checking server state (attempt {attempt + 1})..."
-                                )
-                                check_res = requests.get(
-                                    upload_uri,
-                                    headers={
-                                        "Authorization": f"OAuth {self.access_token}",
-                                        "X-FB-App-ID": self.app_id,
-                                    },
-                                    timeout=10,
-                                )
-                                if check_res.ok:
-                                    server_offset = int(
-                                        check_res.json().get("offset", 0)
-                                    )
-                                    Log.warning(
-                                        f"Server reported offset: {server_offset}. Retrying chunk from there."
-                                    )
-                                    offset = server_offset
-                                    f.seek(offset)
-                                    headers["offset"] = str(offset)
-                                    chunk = f.read(chunk_size)
-                            else:
-                                Log.warning(
-                                    f"Chunk upload failed (attempt {attempt + 1}): {response.text}"
-                                )
-                        except Exception as ce:
-                            Log.warning(
-                                f"Chunk upload error (attempt {attempt + 1}): {ce}"
-                            )
-
-                        if attempt < 2:
-                            time.sleep(2**attempt)
-
-                    if not response.ok:
-                        self._handle_api_error(response, "binary chunk upload")
+                    response = None
+                    try:
+                        response = self.session.post(
+                            upload_uri, headers=headers, data=f, timeout=60
+                        )
+                        if response.ok:
+                            break
+                        Log.warning(
+                            f"Binary upload failed (attempt {attempt + 1}): {response.text}"
+                        )
+                    except requests.RequestException as ue:
+                        Log.warning(f"Binary upload error (attempt {attempt + 1}): {ue}")
+
+                    # Resume from whatever the server already has
+                    server_offset = self._get_upload_offset(upload_uri)
+                    if server_offset is not None:
+                        Log.warning(
+                            f"Server reported offset: {server_offset}. Resuming from there."
+                        )
+                        offset = server_offset
+                        if offset >= file_size:
+                            break
+                else:
+                    if response is not None:
+                        self._handle_api_error(response, "binary upload")
                         response.raise_for_status()
-
-                    offset += len(chunk)
-                    progress = (offset / file_size) * 100
-                    Log.info(
-                        f"Upload progress: {progress:.1f}% ({offset}/{file_size} bytes)"
-                    )
+                    raise Exception(f"Binary upload failed after {max_attempts} attempts")
 
             Log.info("Binary upload completed successfully.")
             return container_id
@@ -285,13 +275,48 @@ class InstagramGraphClient:
             Log.error(f"Failed to upload reel binary: {e}")
             return None
 
+    def _get_upload_offset(self, upload_uri: str) -> int:
+        """Asks the resumable upload endpoint how many bytes it has received"""
+        try:
+            check_res = self.session.get(
+                upload_uri,
+                headers={
+                    "Authorization": f"OAuth {self.access_token}",
+                    "X-FB-App-ID": self.app_id,
+                },
+                timeout=10,
+            )
+            if check_res.ok:
+                server_offset = check_res.json().get("offset")
+                if server_offset is not None:
+                    return int(server_offset)
+        except Exception as check_err:
+            Log.warning(f"Failed to check server offset: {check_err}")
+        return None
+
     def check_status(self, container_id: str) -> str:
         """Check the status of the media container"""
         url = f"{self.base_url}/{container_id}"
         params = {"fields": "id,status_code", "access_token": self.access_token}
 
         try:
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params)
+            if not response.ok:
+                try:
+                    error_data = response.json().get("error", {})
+                except Exception:
+                    error_data = {}
+
+                # Rate limits (codes 4/17/32/613) come back as 400/403 and
+                # transient errors as 5xx; both clear up, so keep polling
+                if error_data.get("code") in TERMINAL_ERROR_CODES or response.status_code == 404:
+                    self._handle_api_error(response, "status check")
+                    return "ERROR"
+                Log.warning(
+                    f"Status check for {container_id} failed ({response.status_code}), "
+                    f"will retry: {error_data.get('message', response.text)}"
+                )
+                return "IN_PROGRESS"
 
             data = response.json()
             status = data.get("status_code")
@@ -314,6 +339,16 @@ class InstagramGraphClient:
 
     def publish_media(self, container_id: str) -> str:
         """Publish the media container"""
+        media_id, _ = self.try_publish_media(container_id)
+        return media_id
+
+    def try_publish_media(self, container_id: str) -> tuple:
+        """
+        Publish the media container without waiting for FINISHED first.
+        Returns (media_id, retryable); retryable is True when publishing
+        failed for any reason other than a terminal Graph API error code,
+        e.g. the container is still processing, and the caller should poll.
+        """
         url = f"{self.base_url}/{self.user_id}/media_publish"
 
         # Graph API: access_token as query param, creation_id as form data
@@ -322,39 +357,49 @@ class InstagramGraphClient:
 
         try:
             Log.info(f"Publishing container: {container_id}")
-            response = requests.post(url, params=params, data=payload)
+            response = self.session.post(url, params=params, data=payload)
             if not response.ok:
+                try:
+                    error_data = response.json().get("error", {})
+                except Exception:
+                    error_data = {}
+
+                if (
+                    error_data.get("code") in MEDIA_NOT_READY_CODES
+                    or error_data.get("error_subcode") in MEDIA_NOT_READY_SUBCODES
+                ):
+                    Log.info(f"Container {container_id} is not ready for publishing yet.")
+                    return None, True
+
                 self._handle_api_error(response, "media publishing")
 
                 # Detect known Meta API bug (Feb 2026): media_publish treats
                 # REELS containers as VIDEO carousel items
-                try:
-                    error_data = response.json().get("error", {})
-                    if error_data.get("error_subcode") == 2207089:
-                        Log.error(
-                            "KNOWN META API BUG: Instagram media_publish is "
-                            "incorrectly treating REELS containers as VIDEO "
-                            "carousel items. This is a server-side issue with "
-                            "no available workaround. Monitor: "
-                            "https://developers.facebook.com/community/"
-                        )
-                except Exception:
-                    pass
+                if error_data.get("error_subcode") == 2207089:
+                    Log.error(
+                        "KNOWN META API BUG: Instagram media_publish is "
+                        "incorrectly treating REELS containers as VIDEO "
+                        "carousel items. This is a server-side issue with "
+                        "no available workaround. Monitor: "
+                        "https://developers.facebook.com/community/"
+                    )
+
+                return None, error_data.get("code") not in TERMINAL_ERROR_CODES
 
             response.raise_for_status()
             media_id = response.json().get("id")
             Log.info(f"Successfully published media: {media_id}")
-            return media_id
+            return media_id, False
         except Exception as e:
             Log.error(f"Failed to publish media: {e}")
-            return None
+            return None, True
 
     def get_media_permalink(self, media_id: str) -> str:
         """Get the permalink of a published media item"""
         url = f"{self.base_url}/{media_id}"
         params = {"fields": "permalink", "access_token": self.access_token}
         try:
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params)
             if not response.ok:
                 self._handle_api_error(response, "getting permalink")
             response.raise_for_status()
@@ -363,11 +408,25 @@ class InstagramGraphClient:
             Log.error(f"Failed to get permalink for media {media_id}: {e}")
             return None
 
-    def wait_and_publish(self, container_id: str, max_retries=30, delay=15) -> str:
+    def wait_and_publish(
+        self, container_id: str, max_retries=30, delay=15, publish_first=True
+    ) -> str:
         """
-        Polls for container status and publishes when ready.
-        Matches the robust polling logic in direct_reel_uploader.py.
+        Polls for container status and publishes when ready. This is the one
+        polling loop shared by every script: polls back off from 2s by 1.5x up
+        to `delay` seconds, with a little jitter.
+        With `publish_first`, short reels that are already processed are
+        published straight away and polling only starts if they aren't.
         """
+        started = time.monotonic()
+        if publish_first:
+            media_id, retryable = self.try_publish_media(container_id)
+            if media_id:
+                return self.get_media_permalink(media_id)
+            if not retryable:
+                Log.error("Publishing failed with a terminal error.")
+                return None
+
         for i in range(max_retries):
             status = self.check_status(container_id)
             Log.info(f"Container status ({i + 1}/{max_retries}): {status}")
@@ -382,14 +441,15 @@ class InstagramGraphClient:
                     Log.error("Publishing failed after processing finished.")
                     return None
 
-            if status == "ERROR":
-                Log.error("Container processing failed on Instagram side.")
+            if status in ("ERROR", "EXPIRED"):
+                Log.error(f"Container processing failed on Instagram side ({status}).")
                 return None
 
-            time.sleep(delay)
+            time.sleep(min(delay, 2 * 1.5**i) + random.uniform(0, 0.5))
 
         Log.error(
-            f"Timeout: Container {container_id} not ready after {max_retries * delay} seconds."
+            f"Timeout: Container {container_id} not ready after "
+            f"{time.monotonic() - started:.0f} seconds."
         )
         return None
 
@@ -397,12 +457,24 @@ class InstagramGraphClient:
         """
         Retrieves information about the current access token, including the App ID.
         Uses the /me endpoint to check basic validity and /app to get app details.
+        Successful lookups are cached for TOKEN_INFO_TTL seconds.
         """
+        if self._token_info and time.time() - self._token_info_at < TOKEN_INFO_TTL:
+            return self._token_info
+
+        token_info = self._fetch_token_info()
+        if token_info:
+            self._token_info = token_info
+            self._token_info_at = time.time()
+        return token_info
+
+    def _fetch_token_info(self) -> dict:
+        """Queries /me and /app for the current access token"""
         try:
             # First, check /me to see if token is valid
             me_url = f"{self.base_url}/me"
             me_params = {"access_token": self.access_token, "fields": "id,name"}
-            me_res = requests.get(me_url, params=me_params)
+            me_res = self.session.get(me_url, params=me_params)
 
             if not me_res.ok:
                 Log.error(f"Token validation failed: {me_res.text}")
@@ -425,7 +497,7 @@ class InstagramGraphClient:
                 "access_token": self.access_token,
                 "fields": "id,name,namespace",
             }
-            app_res = requests.get(app_url, params=app_params)
+            app_res = self.session.get(app_url, params=app_params)
 
             if not app_res.ok:
                 Log.error(f"Failed to fetch App info: {app_res.text}")
@@ -466,7 +538,7 @@ class InstagramGraphClient:
             Log.info(f"Verifying access to container: {container_id}...")
             url = f"{self.base_url}/{container_id}"
             params = {"fields": "id", "access_token": self.access_token}
-            res = requests.get(url, params=params)
+            res = self.session.get(url, params=params)
 
             if not res.ok:
                 if "App ID mismatch" in res.text:
@@ -482,3 +554,14 @@ class InstagramGraphClient:
             )
 
         return True
+
+
+def get_ig_client() -> InstagramGraphClient:
+    """Returns a process-wide client so its connection pool survives across runs"""
+    global _ig_client
+    if _ig_client is None:
+        # Double-checked so concurrent first calls build a single client
+        with _ig_client_lock:
+            if _ig_client is None:
+                _ig_client = InstagramGraphClient()
+    return _ig_client
@@ -1,9 +1,34 @@
 import boto3
-from botocore.exceptions import NoCredentialsError, ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, NoCredentialsError, ClientError
+import mimetypes
 import os
+import threading
 from src.core.logger import Log
 from src.config.settings import settings
 
+# Split reels into 5 MB parts uploaded over parallel connections. Reels are
+# tens of MB, so small parts are what gives the threads something to share.
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=min(16, (os.cpu_count() or 1) * 4),
+    use_threads=True
+)
+
+# Content types for what this pipeline uploads, checked before mimetypes
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.mp4': 'video/mp4',
+}
+
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
 class MinIOClient:
     def __init__(self):
         # Use S3_PUBLIC_URL as a fallback for the endpoint if S3_ENDPOINT_URL is not set
@@ -14,7 +39,13 @@ class MinIOClient:
             endpoint_url=endpoint,
             aws_access_key_id=settings.s3_access_key,
             aws_secret_access_key=settings.s3_secret_key,
-            region_name=settings.s3_region
+            region_name=settings.s3_region,
+            # Standard mode retries throttling, 5xx and connection errors per
+            # request (each multipart part included) and never permanent errors
+            config=Config(
+                max_pool_connections=100,
+                retries={'max_attempts': 5, 'mode': 'standard'}
+            )
         )
         self.bucket_name = settings.s3_bucket_name
         self._ensure_bucket_exists()
@@ -42,24 +73,32 @@ class MinIOClient:
             object_name = os.path.basename(file_path)
 
         # Detect content type
-        import mimetypes
-        content_type, _ = mimetypes.guess_type(file_path)
-        if not content_type:
-            if file_path.endswith('.jpg') or file_path.endswith('.jpeg'):
-                content_type = 'image/jpeg'
-            elif file_path.endswith('.mp4'):
-                content_type = 'video/mp4'
-            else:
-                content_type = 'application/octet-stream'
+        ext = os.path.splitext(file_path)[1].lower()
+        content_type = (
+            CONTENT_TYPES.get(ext)
+            or mimetypes.guess_type(file_path)[0]
+            or 'application/octet-stream'
+        )
 
         try:
-            extra_args = {'ContentType': content_type}
-            self.s3_client.upload_file(
-                file_path, 
-                self.bucket_name, 
-                object_name,
-                ExtraArgs=extra_args
-            )
+            if os.path.getsize(file_path) < TRANSFER_CONFIG.multipart_threshold:
+                # Covers fit in one PUT, skip the transfer manager's thread pool
+                with open(file_path, 'rb') as body:
+                    self.s3_client.put_object(
+                        Bucket=self.bucket_name,
+                        Key=object_name,
+                        Body=body,
+                        ContentType=content_type
+                    )
+            else:
+                extra_args = {'ContentType': content_type}
+                self.s3_client.upload_file(
+                    file_path, 
+                    self.bucket_name, 
+                    object_name,
+                    ExtraArgs=extra_args,
+                    Config=TRANSFER_CONFIG
+                )
             Log.info(f"Successfully uploaded {file_path} to {self.bucket_name}/{object_name} (Type: {content_type})")
             return True
         except FileNotFoundError:
@@ -71,6 +110,14 @@ class MinIOClient:
         except ClientError as e:
             Log.error(f"ClientError during upload: {e}")
             return False
+        except S3UploadFailedError as e:
+            # What the transfer manager raises when a multipart upload fails
+            Log.error(f"Upload failed: {e}")
+            return False
+        except BotoCoreError as e:
+            # Connection/endpoint failures: report them like any other failed upload
+            Log.error(f"Error during upload: {e}")
+            return False
 
     def get_presigned_url(self, object_name: str, expiration=3600) -> str:
         """Generate a presigned URL to share an S3 object"""
@@ -100,3 +147,13 @@ class MinIOClient:
         except ClientError as e:
             Log.error(f"ClientError during deletion: {e}")
             return False
+
+
+def get_storage_client() -> MinIOClient:
+    """Returns a process-wide client so the bucket check and pool are reused"""
+    global _storage_client
+    if _storage_client is None:
+        with _storage_client_lock:
+            if _storage_client is None:
+                _storage_client = MinIOClient()
+    return _storage_client